@@ -0,0 +1,132 @@
+'''
+Benchmark of the per-generation cost of the simulation engine.
+
+Every phase of a generation (group division, reproduction, pool update and
+mutation) is timed separately for the model variants of the repository
+(two sizes/two strategies, three size tree groups and four selfishness
+levels), plus variants with different group sizes and numbers of
+strategies, across population sizes. The peak memory of a generation is
+measured with tracemalloc. Results can be saved as a JSON baseline and
+later runs compared against it:
+
+python benchmarks/bench_generation.py --output baseline.json
+python benchmarks/bench_generation.py --compare baseline.json --tolerance 0.25
+'''
+import argparse
+import json
+import os
+import platform
+import sys
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from group_selection import lookup  # noqa: E402
+from group_selection.instrument import Profiler  # noqa: E402
+from group_selection.model import (Model, create_pool, generation, powers_model, selfishness_levels,  # noqa: E402
+                                   selfishness_model, tree_groups_model)
+
+PHASES = ['divide', 'reproduction', 'update', 'mutation']
+
+CASES = {
+    'powers': lambda pop: powers_model(pop=pop),
+    'tree_groups': lambda pop: tree_groups_model(pop=pop, mutation_rate=0.5),
+    'selfishness': lambda pop: selfishness_model(pop=pop),
+    'powers_large_g=10': lambda pop: powers_model(pop=pop, large_g=10),
+    'powers_large_g=160': lambda pop: powers_model(pop=pop, large_g=160),
+    'levels=16': lambda pop: Model([('L', 40, 50), ('S', 4, 4)], selfishness_levels(16), pop=pop,
+                                   mutation_rate=0.5),
+}
+
+
+def time_phases(model, pool, rng):
+    '''
+    Running one generation of the model and returning the new pool and the
+    wall time of every phase.
+    '''
+    profiler = Profiler()
+    pool = generation(model, pool, rng, profiler)
+    return pool, profiler.current
+
+
+def measure(model, generations, seed=0):
+    '''
+    Timing generations generations of the model (after one warm up
+    generation) and measuring the peak memory allocated by one generation.
+    The median time of every phase is returned in seconds.
+    '''
+    rng = np.random.default_rng(seed)
+    lookup.default_cache.clear()
+    pool, _ = time_phases(model, create_pool(model), rng)
+    samples = {phase: [] for phase in PHASES}
+    for _ in range(generations):
+        pool, times = time_phases(model, pool, rng)
+        for phase in PHASES:
+            samples[phase].append(times[phase])
+    tracemalloc.start()
+    time_phases(model, pool, rng)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    res = {phase: float(np.median(samples[phase])) for phase in PHASES}
+    res['total'] = sum(res[phase] for phase in PHASES)
+    res['peak_memory'] = peak
+    return res
+
+
+def run_suite(cases, pops, generations):
+    results = {}
+    for name in cases:
+        for pop in pops:
+            key = '{}/pop={}'.format(name, pop)
+            results[key] = measure(CASES[name](pop), generations)
+            print('{:<32} {:>10.5f} s/generation {:>12.1f} KiB peak'
+                  .format(key, results[key]['total'], results[key]['peak_memory'] / 1024))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    '''
+    Returning the list of (key, metric, baseline value, new value) for
+    every total time or peak memory which is more than tolerance (as a
+    fraction) worse than in the baseline.
+    '''
+    regressions = []
+    for key, res in results.items():
+        if key not in baseline:
+            continue
+        for metric in ['total', 'peak_memory']:
+            old = baseline[key][metric]
+            if res[metric] > old * (1 + tolerance):
+                regressions.append((key, metric, old, res[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', nargs='+', default=list(CASES), choices=list(CASES))
+    parser.add_argument('--pops', nargs='+', type=int, default=[4000, 10 ** 5, 10 ** 6, 10 ** 7])
+    parser.add_argument('--generations', type=int, default=5)
+    parser.add_argument('--output', help='JSON file where the results are saved')
+    parser.add_argument('--compare', help='JSON baseline the results are compared against')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.cases, args.pops, args.generations)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'machine': platform.platform(), 'python': platform.python_version(),
+                       'numpy': np.__version__, 'results': results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for key, metric, old, new in regressions:
+            print('REGRESSION {} {}: {:.6g} -> {:.6g}'.format(key, metric, old, new))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# Makes the group_selection package importable when running pytest from any
+# directory (pytest adds the directory of this file to sys.path).
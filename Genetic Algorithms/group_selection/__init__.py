@@ -0,0 +1,23 @@
+'''
+Group selection simulation library used to reproduce and extend
+"Individual Selection for Cooperative Group Formation" (Powers et al.).
+'''
+from .population import create_pool, divide_in_groups, update_pool, split_class, Empirical, Fixed, Poisson
+from .replicator import replicate, reproduction
+from .model import (Model, SizeClass, Strategy, generation, run, powers_model, tree_groups_model, selfishness_levels,
+                    selfishness_model)
+from .ensemble import Ensemble, run_ensemble
+from .sweep import SweepStore, expand_grid, run_sweep
+from .history import History
+from .lookup import TransitionCache
+from .deterministic import run_expected
+from .mutation import mutate
+from .simulation import Result, build_model, simulate
+from .instrument import Profiler
+from .islands import migrate, run_islands
+from .streaming import Snapshot, LivePlot, decimate, iter_generations, monitor
+from .stopping import Extinction, Fixation, Stationary, run_until
+from .cache import ResultCache
+from .trajectories import TrajectoryStore, TrajectoryWriter, write_ensemble
+from .phase import Classifier, bisect_boundary, map_phases
+from .individuals import Ancestry, run_individuals
@@ -0,0 +1,61 @@
+'''
+Command line entry point for headless simulation runs, eg.
+
+python -m group_selection --model powers_model --iter-num 1000 --seed 1 --set K=0.2 --output run.csv
+'''
+import argparse
+import ast
+import sys
+
+from .cache import ResultCache
+from .simulation import simulate
+
+
+def parse_value(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m group_selection',
+                                     description='Run a group selection simulation.')
+    parser.add_argument('--model', default='powers_model',
+                        help='model factory in group_selection.model (default: powers_model)')
+    parser.add_argument('--iter-num', type=int, default=120, help='number of generations (default: 120)')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the random number generator')
+    parser.add_argument('--mode', choices=['stochastic', 'individual', 'expected'], default='stochastic')
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help='model parameter, can be repeated (eg. --set large_g=40 --set K=0.2)')
+    parser.add_argument('--cache', nargs='?', const=True, default=None, metavar='DIR',
+                        help='look the result up in (and store it to) the result cache, optionally in DIR')
+    parser.add_argument('--output', help='CSV file where the genotype counts of every generation are saved')
+    parser.add_argument('--plot', help='image file where the genotype frequencies are plotted')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {'model': args.model, 'iter_num': args.iter_num, 'seed': args.seed, 'mode': args.mode}
+    for item in args.set:
+        name, _, value = item.partition('=')
+        config[name] = parse_value(value)
+    cache = ResultCache(args.cache) if isinstance(args.cache, str) else args.cache
+    result = simulate(config, cache)
+    if args.output:
+        result.to_frame().to_csv(args.output, index=False)
+    if args.plot:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        result.plot()
+        plt.savefig(args.plot)
+    final = result.frequencies()[-1]
+    for label, freq in zip(result.labels, final):
+        print('{}: {:.4f}'.format(label, freq))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import functools
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+def _json_default(value):
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+
+def canonical_json(obj):
+    '''
+    JSON representation of obj with sorted keys (numpy scalars are
+    converted to the equivalent Python numbers).
+    '''
+    return json.dumps(obj, sort_keys=True, default=_json_default)
+
+
+def config_hash(obj):
+    '''
+    SHA-256 of the canonical JSON representation of obj, so that equal
+    configurations always have the same hash.
+    '''
+    return hashlib.sha256(canonical_json(obj).encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def code_version():
+    '''
+    Hash of the source code of the group_selection package: any change to
+    the model code changes it and therefore invalidates the cached results.
+    '''
+    digest = hashlib.sha256()
+    package = os.path.dirname(os.path.abspath(__file__))
+    for fname in sorted(os.listdir(package)):
+        if fname.endswith('.py'):
+            with open(os.path.join(package, fname), 'rb') as f:
+                digest.update(fname.encode() + b'\0' + f.read())
+    return digest.hexdigest()
+
+
+def default_path():
+    return os.environ.get('GROUP_SELECTION_CACHE',
+                          os.path.join(os.path.expanduser('~'), '.cache', 'group_selection'))
+
+
+class ResultCache:
+    '''
+    Persistent cache of simulation results shared by notebooks, the command
+    line and sweeps. Every result is stored in a .npz file named after the
+    hash of its full configuration (model parameters with their defaults
+    filled in, seed and simulation options) and of the code version, so
+    that identical requests return the stored trajectory immediately.
+
+    Reading a result marks it as recently used; when the cache grows over
+    max_bytes the least recently used results are evicted.
+    '''
+
+    def __init__(self, path=None, max_bytes=2 ** 30):
+        self.path = default_path() if path is None else path
+        self.max_bytes = max_bytes
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + '.npz')
+
+    def key(self, config):
+        return config_hash({'config': config, 'code': code_version()})
+
+    def get(self, config):
+        '''
+        Returning the stored values for config, or None if they are not in
+        the cache.
+        '''
+        fname = self._file(self.key(config))
+        try:
+            with np.load(fname) as data:
+                values = data['values']
+            os.utime(fname)
+        except (OSError, KeyError, ValueError):
+            return None
+        return values
+
+    def put(self, config, values):
+        fname = self._file(self.key(config))
+        tmp = fname + '.{}.tmp.npz'.format(os.getpid())
+        np.savez_compressed(tmp, values=values, config=canonical_json(config))
+        os.replace(tmp, fname)
+        self.evict()
+
+    def entries(self):
+        res = []
+        for fname in os.listdir(self.path):
+            if fname.endswith('.npz') and not fname.endswith('.tmp.npz'):
+                try:
+                    st = os.stat(os.path.join(self.path, fname))
+                except FileNotFoundError:
+                    continue
+                res.append((st.st_mtime, st.st_size, fname))
+        return sorted(res)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        '''
+        Removing the least recently used results until the cache is not
+        larger than max_bytes.
+        '''
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, fname in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.path, fname))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, fname in self.entries():
+            try:
+                os.remove(os.path.join(self.path, fname))
+            except FileNotFoundError:
+                pass
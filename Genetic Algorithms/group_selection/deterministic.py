@@ -0,0 +1,84 @@
+import itertools
+import math
+
+import numpy as np
+
+from .mutation import expected_mutation
+from .replicator import advance
+
+
+def compositions(group_size, n_strategies):
+    '''
+    Enumerating all the possible compositions of a group of group_size
+    individuals with n_strategies strategies as a
+    (n_compositions, n_strategies) matrix (stars and bars).
+    '''
+    bars = np.array(list(itertools.combinations(range(group_size + n_strategies - 1), n_strategies - 1)),
+                    dtype=np.int64).reshape(-1, n_strategies - 1)
+    edges = np.hstack([np.full((len(bars), 1), -1), bars, np.full((len(bars), 1), group_size + n_strategies - 1)])
+    return np.diff(edges, axis=1) - 1
+
+
+def composition_tables(model, max_compositions=10 ** 6):
+    '''
+    Precomputing, for every size class of the model, the matrix of all the
+    group compositions, the log multinomial coefficient of each of them and
+    the (integer) outcome of the replicator equations at disposal.
+    '''
+    n_strategies = model.shape[1]
+    tables = []
+    for size in model.size_classes:
+        if not isinstance(size.group_size, (int, np.integer)):
+            raise ValueError('The expected mode supports only fixed integer group sizes (size class {} has {!r})'
+                             .format(size.name, size.group_size))
+        if math.comb(size.group_size + n_strategies - 1, n_strategies - 1) > max_compositions:
+            raise ValueError('Size class {} has more than {} group compositions'
+                             .format(size.name, max_compositions))
+        comps = compositions(size.group_size, n_strategies)
+        log_fact = np.concatenate([[0], np.cumsum(np.log(np.arange(1, size.group_size + 1)))])
+        log_coef = log_fact[size.group_size] - log_fact[comps].sum(axis=1)
+        outcomes = advance(comps, model.disposal_limit, size.r, model.g, model.c, model.K, model.method, model.rtol)
+        tables.append((comps, log_coef, outcomes))
+    return tables
+
+
+def expected_generation(model, freqs, tables):
+    '''
+    Propagating the genotype frequencies of an infinite population for one
+    generation. In every size class the groups are multinomial samples of
+    the strategy frequencies of the class, so the expected output of the
+    class is obtained by summing the outcome of every composition weighted
+    by its multinomial probability (and by the number of groups the class
+    can form). The frequencies are then normalised as in update_pool and
+    the expected effect of mutation is applied.
+    '''
+    res = np.zeros_like(freqs)
+    for i, (comps, log_coef, outcomes) in enumerate(tables):
+        total = freqs[i].sum()
+        if total == 0:
+            continue
+        p = freqs[i] / total
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_prob = log_coef + np.where(comps > 0, comps * np.log(p), 0).sum(axis=1)
+        prob = np.exp(log_prob)
+        res[i] = total / model.size_classes[i].group_size * (prob @ outcomes)
+    res = res / res.sum()
+    return expected_mutation(res, model.mutation_rate, model.mutation_matrix, model.size_mutation_matrix)
+
+
+def run_expected(model, iter_num):
+    '''
+    Deterministic (infinite population) version of model.run: the genotype
+    frequencies of every generation are returned as a
+    (iter_num + 1, n_genotypes) matrix of floats. Since group outcomes are
+    truncated to whole individuals as in the stochastic model, this is the
+    limit the average of stochastic runs tends to when pop grows.
+    '''
+    tables = composition_tables(model)
+    freqs = np.full(model.shape, 1 / (model.shape[0] * model.shape[1]))
+    res = np.zeros((iter_num + 1, freqs.size))
+    res[0] = freqs.ravel()
+    for i in range(1, iter_num + 1):
+        freqs = expected_generation(model, freqs, tables)
+        res[i] = freqs.ravel()
+    return res
@@ -0,0 +1,54 @@
+from collections import namedtuple
+import multiprocessing
+from statistics import NormalDist
+
+import numpy as np
+
+from .model import run
+
+Ensemble = namedtuple('Ensemble', ['mean', 'lower', 'upper', 'frequencies'])
+
+
+def _replicate(model, iter_num, seed_seq):
+    return run(model, iter_num, np.random.default_rng(seed_seq))
+
+
+def run_ensemble(model, iter_num, n_replicates=100, seed=None, processes=None, confidence=0.95):
+    '''
+    Running n_replicates independent trajectories of the same model across
+    a pool of worker processes (processes=None uses all the cores, while
+    processes=1 runs everything in the current process). Each replicate gets
+    its own numpy Generator spawned from a SeedSequence built from seed, so
+    an ensemble is reproducible independently of how the replicates are
+    scheduled on the workers.
+
+    The genotype frequencies of every replicate are returned together with
+    their per-generation mean and the lower and upper bounds of the
+    confidence interval of the mean, all with shape
+    (iter_num + 1, n_genotypes) except frequencies which has shape
+    (n_replicates, iter_num + 1, n_genotypes).
+    '''
+    seeds = np.random.SeedSequence(seed).spawn(n_replicates)
+    args = [(model, iter_num, s) for s in seeds]
+    if processes == 1:
+        trajectories = [_replicate(*a) for a in args]
+    else:
+        with multiprocessing.Pool(processes) as p:
+            trajectories = p.starmap(_replicate, args)
+    counts = np.stack(trajectories)
+    totals = counts.sum(axis=2, keepdims=True)
+    frequencies = np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0)
+    return summarise(frequencies, confidence)
+
+
+def summarise(frequencies, confidence=0.95):
+    '''
+    Computing the per-generation mean of a (n_replicates, generations,
+    n_genotypes) array of frequencies and the normal approximation
+    confidence interval of the mean at the given confidence level.
+    '''
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    mean = frequencies.mean(axis=0)
+    n = frequencies.shape[0]
+    half_width = z * frequencies.std(axis=0, ddof=1) / np.sqrt(n) if n > 1 else np.zeros_like(mean)
+    return Ensemble(mean, mean - half_width, mean + half_width, frequencies)
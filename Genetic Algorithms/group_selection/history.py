@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+
+
+class History:
+    '''
+    Recorder of the genotype counts of every generation. The counts are
+    written in a preallocated (chunk_size, n_genotypes) integer array,
+    which replaces growing a DataFrame with df.append at every generation
+    (quadratic in the number of generations).
+
+    Without a path, the array is doubled whenever it is full, so recording
+    has amortised constant cost. With a path, every full chunk is instead
+    flushed to disk (appended to a CSV file, or written as a new part file
+    of a Parquet directory when fmt='parquet') and the array is reused, so
+    the memory used by long runs stays bounded. The recorded history is
+    turned into a pandas DataFrame only when to_frame is called.
+    '''
+
+    def __init__(self, columns, chunk_size=1024, path=None, fmt='csv'):
+        self.columns = ['Iteration Num'] + list(columns)
+        self.chunk_size = chunk_size
+        self.path = path
+        self.fmt = fmt
+        self._data = np.zeros((chunk_size, len(self.columns)), dtype=np.int64)
+        self._n = 0
+        self._parts = 0
+        self._flushed = 0
+        if path is not None and fmt == 'parquet':
+            os.makedirs(path, exist_ok=True)
+
+    def __len__(self):
+        return self._flushed + self._n
+
+    def record(self, generation, counts):
+        '''
+        Recording the genotype counts of a generation (in the order of the
+        columns given when creating the recorder).
+        '''
+        if self._n == len(self._data):
+            if self.path is None:
+                self._data = np.concatenate([self._data, np.zeros_like(self._data)])
+            else:
+                self.flush()
+        self._data[self._n, 0] = generation
+        self._data[self._n, 1:] = np.ravel(counts)
+        self._n += 1
+
+    def flush(self):
+        '''
+        Writing the generations currently held in memory to disk.
+        '''
+        if self.path is None or self._n == 0:
+            return
+        rows = self._data[:self._n]
+        if self.fmt == 'parquet':
+            import pandas as pd
+            fname = os.path.join(self.path, 'part-{:05d}.parquet'.format(self._parts))
+            pd.DataFrame(rows, columns=self.columns).to_parquet(fname, index=False)
+        else:
+            with open(self.path, 'a' if self._parts else 'w') as f:
+                np.savetxt(f, rows, fmt='%d', delimiter=',',
+                           header=','.join(self.columns) if self._parts == 0 else '', comments='')
+        self._parts += 1
+        self._flushed += self._n
+        self._n = 0
+
+    def array(self):
+        '''
+        Returning the recorded rows held in memory (all the history when no
+        path was given) as a (generations, 1 + n_genotypes) array view.
+        '''
+        return self._data[:self._n]
+
+    def to_frame(self):
+        '''
+        Returning the whole history as a pandas DataFrame with one row per
+        generation. Chunks already flushed to disk are read back.
+        '''
+        import pandas as pd
+        frames = []
+        if self.path is not None and self._parts:
+            if self.fmt == 'parquet':
+                frames.append(pd.read_parquet(self.path))
+            else:
+                frames.append(pd.read_csv(self.path))
+        frames.append(pd.DataFrame(self.array(), columns=self.columns))
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,110 @@
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+import time
+import tracemalloc
+
+_disabled = nullcontext()
+
+
+def disabled_phase(name):
+    return _disabled
+
+
+class Profiler:
+    '''
+    Instrumentation of the generation loop. The phases of a generation
+    (divide, reproduction, update, mutation and record) are timed, and if
+    track_allocations is True the peak memory allocated by every phase is
+    measured with tracemalloc. Counters such as the number of groups formed
+    and the number of individuals discarded by divide_in_groups are
+    collected as well.
+
+    At the end of every generation each callback is called with the
+    generation number and a dictionary containing the time of every phase
+    (in seconds), the allocations (as '<phase>_alloc', in bytes) and the
+    counters of the generation. Totals over the whole run are available
+    from summary. When no profiler is given, the generation loop only pays
+    for entering a shared no-op context manager for every phase.
+
+    If the profiler started tracemalloc, tracing is stopped by close (or
+    when leaving a with block), so that later allocations do not pay for
+    it.
+    '''
+
+    def __init__(self, callbacks=(), track_allocations=False):
+        self.callbacks = list(callbacks)
+        self.track_allocations = track_allocations
+        self._started_tracing = False
+        self.totals = defaultdict(float)
+        self.generations = 0
+        self.current = defaultdict(float)
+
+    @contextmanager
+    def phase(self, name):
+        if self.track_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current[name] += time.perf_counter() - t
+            if self.track_allocations:
+                self.current[name + '_alloc'] += tracemalloc.get_traced_memory()[1] - start_memory
+
+    def close(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def count(self, name, value):
+        self.current[name] += value
+
+    def end_generation(self, generation):
+        '''
+        Closing the statistics of a generation and passing them to the
+        callbacks.
+        '''
+        record = dict(self.current)
+        for key, value in record.items():
+            self.totals[key] += value
+        self.generations += 1
+        self.current = defaultdict(float)
+        for callback in self.callbacks:
+            callback(generation, record)
+
+    def summary(self):
+        '''
+        Returning the totals and the per-generation means of every phase
+        and counter over all the generations recorded so far.
+        '''
+        n = max(self.generations, 1)
+        return {key: {'total': value, 'mean': value / n} for key, value in self.totals.items()}
+
+    def report(self):
+        lines = ['{:<20} {:>14} {:>14}'.format('', 'total', 'per generation')]
+        for key, value in sorted(self.summary().items()):
+            lines.append('{:<20} {:>14.6g} {:>14.6g}'.format(key, value['total'], value['mean']))
+        return '\n'.join(lines)
+
+
+def print_every(n):
+    '''
+    Callback printing the iteration number and the time spent in the
+    generation every n generations.
+    '''
+    def callback(generation, record):
+        if generation % n == 0:
+            elapsed = sum(v for k, v in record.items() if k in ('divide', 'reproduction', 'update', 'mutation',
+                                                                 'record'))
+            print('Iteration Number:', generation, '({:.4f} s)'.format(elapsed))
+    return callback
@@ -0,0 +1,150 @@
+from collections import namedtuple
+import multiprocessing
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+import threading
+
+import numpy as np
+
+from .model import create_pool, generation
+
+IslandRun = namedtuple('IslandRun', ['labels', 'demes'])
+
+
+def migrate(pools, rate, rng):
+    '''
+    Migration step of the island model on a (n_demes, n_sizes,
+    n_strategies) array of counts, updated in place. Every individual
+    leaves its deme with probability rate, and all the migrants are
+    redistributed uniformly at random among the demes.
+    '''
+    if rate == 0:
+        return pools
+    n_demes = pools.shape[0]
+    migrants = rng.binomial(pools, rate)
+    pools -= migrants
+    arrivals = rng.multinomial(migrants.sum(axis=0).ravel(), np.full(n_demes, 1 / n_demes))
+    pools += arrivals.T.reshape(pools.shape)
+    return pools
+
+
+def _evolve(model, pools, demes, generations, rngs):
+    for d, rng in zip(demes, rngs):
+        pool = pools[d]
+        for _ in range(generations):
+            pool = generation(model, pool, rng)
+        pools[d] = pool
+
+
+def _worker(shm_name, shape, demes, model, generations, n_epochs, seed_seqs, barrier):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    pools = np.ndarray(shape, dtype=np.int64, buffer=shm.buf)
+    rngs = [np.random.default_rng(s) for s in seed_seqs]
+    try:
+        for _ in range(n_epochs):
+            _evolve(model, pools, demes, generations, rngs)
+            barrier.wait()
+            barrier.wait()
+    except threading.BrokenBarrierError:
+        # Another worker failed (or the parent aborted), which the parent
+        # process reports.
+        pass
+    except BaseException:
+        barrier.abort()
+        raise
+    finally:
+        del pools
+        shm.close()
+
+
+def _watch(workers, barrier, done):
+    '''
+    Aborting the barrier as soon as a worker dies without going through
+    its exception handler (eg. killed by a signal or the OOM killer), so
+    that the parent never waits for it forever.
+    '''
+    pending = {w.sentinel: w for w in workers}
+    while pending and not done.is_set():
+        for sentinel in wait(list(pending), timeout=0.5):
+            # The sentinel can be ready slightly before the process is
+            # reaped, when its exit code is still None.
+            worker = pending.pop(sentinel)
+            worker.join()
+            if worker.exitcode != 0:
+                barrier.abort()
+                return
+
+
+def run_islands(model, n_demes, n_epochs, generations=1, migration_rate=0.1, seed=None, processes=None):
+    '''
+    Island model: n_demes demes of model.pop individuals each run the
+    group formation/reproduction cycle independently, and every
+    generations generations (an epoch) individuals migrate between the
+    demes with probability migration_rate (see migrate).
+
+    The demes are sharded across processes worker processes (all the cores
+    by default) and their count matrices live in shared memory, so that
+    migration, which is done by the parent process between two barriers,
+    never pickles any population. Every deme has its own numpy Generator
+    spawned from a SeedSequence built from seed, so a seeded run gives the
+    same result whatever the number of processes.
+
+    The genotype counts of every deme after each epoch are returned as a
+    (n_epochs + 1, n_demes, n_genotypes) array, with columns following
+    labels.
+    '''
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(processes, n_demes))
+    shape = (n_demes,) + model.shape
+    seeds = np.random.SeedSequence(seed)
+    deme_seeds = seeds.spawn(n_demes)
+    rng = np.random.default_rng(seeds.spawn(1)[0])
+    res = np.zeros((n_epochs + 1, n_demes, model.shape[0] * model.shape[1]), dtype=np.int64)
+
+    if processes == 1:
+        pools = np.array([create_pool(model)] * n_demes)
+        res[0] = pools.reshape(n_demes, -1)
+        rngs = [np.random.default_rng(s) for s in deme_seeds]
+        for epoch in range(1, n_epochs + 1):
+            _evolve(model, pools, range(n_demes), generations, rngs)
+            migrate(pools, migration_rate, rng)
+            res[epoch] = pools.reshape(n_demes, -1)
+        return IslandRun(model.labels, res)
+
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(np.int64).itemsize)
+    try:
+        pools = np.ndarray(shape, dtype=np.int64, buffer=shm.buf)
+        pools[:] = create_pool(model)
+        res[0] = pools.reshape(n_demes, -1)
+        barrier = multiprocessing.Barrier(processes + 1)
+        workers = [multiprocessing.Process(target=_worker,
+                                           args=(shm.name, shape, list(demes), model, generations, n_epochs,
+                                                 [deme_seeds[d] for d in demes], barrier))
+                   for demes in np.array_split(np.arange(n_demes), processes)]
+        for w in workers:
+            w.start()
+        done = threading.Event()
+        watchdog = threading.Thread(target=_watch, args=(workers, barrier, done), daemon=True)
+        watchdog.start()
+        try:
+            for epoch in range(1, n_epochs + 1):
+                barrier.wait()
+                migrate(pools, migration_rate, rng)
+                res[epoch] = pools.reshape(n_demes, -1)
+                barrier.wait()
+        except threading.BrokenBarrierError:
+            raise RuntimeError('An island model worker failed')
+        except BaseException:
+            barrier.abort()
+            raise
+        finally:
+            done.set()
+            watchdog.join()
+            for w in workers:
+                w.join()
+        del pools
+    finally:
+        shm.close()
+        shm.unlink()
+    return IslandRun(model.labels, res)
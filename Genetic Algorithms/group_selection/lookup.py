@@ -0,0 +1,108 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from .population import size_limit
+from .replicator import advance
+
+
+class TransitionCache:
+    '''
+    Memoization layer for the replicator outcome of group compositions.
+    Groups with the same composition (and the same parameters) always
+    reproduce in the same way, and for small groups the number of distinct
+    compositions is tiny (eg. 5 compositions of 4 individuals with two
+    strategies, 35 with four).
+
+    When every composition of a size class can be encoded as a mixed radix
+    number smaller than max_table_size, the outcome of all of them is
+    precomputed once in a table and every generation becomes a table
+    lookup. For larger groups (whose composition space is too big to be
+    tabulated) only the distinct compositions of every generation are
+    simulated, and their outcomes are kept in a least recently used cache
+    holding at most maxsize compositions. Tables are kept for the
+    max_tables most recently used parameter sets, so long sweeps over many
+    parameter values do not accumulate them.
+    '''
+
+    def __init__(self, max_table_size=65536, maxsize=100000, max_tables=64):
+        self.max_table_size = max_table_size
+        self.maxsize = maxsize
+        self.max_tables = max_tables
+        self.tables = OrderedDict()
+        self.lru = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.tables.clear()
+        self.lru.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def replicate(self, groups, group_size, disposal_limit, r, g, c, K, method='discrete', rtol=1e-6):
+        '''
+        Same as replicator.advance for groups of at most group_size
+        individuals (or of the sizes of a group size distribution, see
+        population.split_class) sharing the resource r, but looking the
+        outcome of every composition up instead of simulating it again.
+        '''
+        groups = np.asarray(groups, dtype=np.int64)
+        if len(groups) == 0:
+            return groups.copy()
+        n_strategies = groups.shape[1]
+        base = size_limit(group_size, groups) + 1
+        key = (base, float(r), int(disposal_limit), tuple(np.ravel(g)), tuple(np.ravel(c)),
+               tuple(np.ravel(K)), method, rtol)
+        radix = base ** np.arange(n_strategies)
+        if base ** n_strategies <= self.max_table_size:
+            table = self.tables.get(key)
+            if table is None:
+                self.misses += 1
+                compositions = np.arange(base ** n_strategies)[:, None] // radix % base
+                table = advance(compositions, disposal_limit, r, g, c, K, method, rtol)
+                self.tables[key] = table
+                while len(self.tables) > self.max_tables:
+                    self.tables.popitem(last=False)
+            else:
+                self.tables.move_to_end(key)
+                self.hits += 1
+            return table[groups @ radix]
+        if n_strategies * np.log2(base) < 62:
+            # Compositions are encoded as mixed radix integers, which are much
+            # faster to deduplicate and hash than the rows themselves.
+            codes, index, inverse = np.unique(groups @ radix, return_index=True, return_inverse=True)
+            unique = groups[index]
+            row_keys = codes.tolist()
+        else:
+            unique, inverse = np.unique(groups, axis=0, return_inverse=True)
+            row_keys = [row.tobytes() for row in unique]
+        res = np.empty_like(unique)
+        missing = []
+        for i, row_key in enumerate(row_keys):
+            cached = self.lru.get((key, row_key))
+            if cached is None:
+                missing.append(i)
+            else:
+                self.lru.move_to_end((key, row_key))
+                res[i] = cached
+        self.hits += len(unique) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            res[missing] = advance(unique[missing], disposal_limit, r, g, c, K, method, rtol)
+            for i in missing:
+                self.lru[(key, row_keys[i])] = res[i].copy()
+            while len(self.lru) > self.maxsize:
+                self.lru.popitem(last=False)
+        return res[inverse.ravel()]
+
+    def reproduction(self, divisions, group_sizes, disposal_limit, r, g, c, K, method='discrete', rtol=1e-6):
+        '''
+        Memoized version of replicator.reproduction: every division is
+        looked up in the table (or cache) of its size class.
+        '''
+        return [self.replicate(groups, size, disposal_limit, r_i, g, c, K, method, rtol)
+                for groups, size, r_i in zip(divisions, group_sizes, r)]
+
+
+default_cache = TransitionCache()
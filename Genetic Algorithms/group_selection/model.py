@@ -0,0 +1,197 @@
+from collections import namedtuple
+
+import numpy as np
+
+from . import instrument, lookup, mutation, population, replicator
+
+SizeClass = namedtuple('SizeClass', ['name', 'group_size', 'r'])
+Strategy = namedtuple('Strategy', ['name', 'g', 'c'])
+
+
+class Model:
+    '''
+    Single model definition driving the simulation engine: a table of
+    size classes (each with its group size and group resource r) and a
+    table of strategies (each with its growth rate g and consumption rate
+    c). Group sizes can be integers or group size distributions (see
+    population.group_size). Every combination of size class and strategy
+    is a genotype, so the population is a (n_sizes, n_strategies) matrix of
+    counts and any number of size classes and strategies can be simulated
+    by the same code.
+
+    After every generation each individual mutates with probability
+    mutation_rate, getting a new strategy according to mutation_matrix
+    (uniformly random by default) and a new size preference according to
+    size_mutation_matrix (unchanged by default).
+
+    With method='continuous' the disposal time is integrated as a
+    continuous time process with an adaptive solver (relative tolerance
+    rtol) instead of disposal_limit discrete updates. rtol is the local
+    tolerance of every solver step (the error at disposal is of the same
+    order) with respect to the continuous time equations, which differ
+    from the discrete updates (by about 15% at disposal_limit=4).
+
+    With memoize=True the outcome of every group composition is looked up
+    in lookup.default_cache instead of being simulated at every generation
+    (the results are identical, only faster).
+    '''
+
+    def __init__(self, size_classes, strategies, pop=4000, disposal_limit=4, K=0.1, mutation_rate=0.0,
+                 mutation_matrix=None, size_mutation_matrix=None, method='discrete', rtol=1e-6, memoize=True):
+        self.size_classes = [SizeClass(name, population.group_size(size), r) for name, size, r in size_classes]
+        self.strategies = [Strategy(*s) for s in strategies]
+        self.pop = pop
+        self.disposal_limit = disposal_limit
+        self.K = K
+        self.mutation_rate = mutation_rate
+        self.mutation_matrix = mutation_matrix
+        self.size_mutation_matrix = size_mutation_matrix
+        self.method = method
+        self.rtol = rtol
+        self.memoize = memoize
+
+    @property
+    def shape(self):
+        return len(self.size_classes), len(self.strategies)
+
+    @property
+    def group_sizes(self):
+        sizes = [s.group_size for s in self.size_classes]
+        if all(isinstance(s, (int, np.integer)) for s in sizes):
+            return np.array(sizes)
+        return sizes
+
+    @property
+    def r(self):
+        return np.array([s.r for s in self.size_classes], dtype=float)
+
+    @property
+    def g(self):
+        return np.array([s.g for s in self.strategies], dtype=float)
+
+    @property
+    def c(self):
+        return np.array([s.c for s in self.strategies], dtype=float)
+
+    @property
+    def labels(self):
+        '''
+        Genotype labels (strategy name followed by size name, eg. 'SL') in
+        the same order as the flattened population matrix.
+        '''
+        return [s.name + z.name for z in self.size_classes for s in self.strategies]
+
+    def __repr__(self):
+        return ('Model(size_classes={}, strategies={}, pop={}, disposal_limit={}, K={}, mutation_rate={}, '
+                'method={!r}, memoize={})'.format(self.size_classes, self.strategies, self.pop, self.disposal_limit,
+                                                  self.K, self.mutation_rate, self.method, self.memoize))
+
+
+def create_pool(model):
+    '''
+    Creating the initial population of the model with every genotype
+    equally represented.
+    '''
+    return population.create_pool(model.pop, *model.shape)
+
+
+def reproduce(model, groups):
+    '''
+    Advancing the groups of every size class (a list of (n_groups,
+    n_strategies) matrices) through the disposal time with the engine
+    options of the model.
+    '''
+    if model.memoize:
+        return lookup.default_cache.reproduction(groups, model.group_sizes, model.disposal_limit, model.r, model.g,
+                                                 model.c, model.K, model.method, model.rtol)
+    return replicator.reproduction(groups, model.disposal_limit, model.r, model.g, model.c, model.K, model.method,
+                                   model.rtol)
+
+
+def generation(model, pool, rng, profiler=None):
+    '''
+    Running one full generation of the model: the pool is divided in
+    groups, every group reproduces for the disposal time and the
+    divisions are merged back into a new pool of model.pop individuals
+    to which mutation is applied. If a profiler (see instrument.Profiler)
+    is given, every phase is timed and the number of groups formed and of
+    individuals discarded are counted.
+    '''
+    phase = profiler.phase if profiler is not None else instrument.disabled_phase
+    with phase('divide'):
+        groups = population.divide_in_groups(pool, model.group_sizes, rng)
+    if profiler is not None:
+        profiler.count('groups', sum(len(g) for g in groups))
+        profiler.count('discarded', int(pool.sum()) - sum(int(g.sum()) for g in groups))
+    with phase('reproduction'):
+        groups = reproduce(model, groups)
+    with phase('update'):
+        pool = population.update_pool(groups, model.pop)
+    with phase('mutation'):
+        pool = mutation.mutate(pool, model.mutation_rate, rng, model.mutation_matrix, model.size_mutation_matrix)
+    return pool
+
+
+def run(model, iter_num, rng, profiler=None):
+    '''
+    Running iter_num generations of the model starting from the initial
+    pool. The genotype counts of every generation (including the initial
+    one) are returned as a (iter_num + 1, n_genotypes) matrix whose columns
+    follow model.labels.
+    '''
+    phase = profiler.phase if profiler is not None else instrument.disabled_phase
+    pool = create_pool(model)
+    res = np.zeros((iter_num + 1, pool.size), dtype=np.int64)
+    res[0] = pool.ravel()
+    for i in range(1, iter_num + 1):
+        pool = generation(model, pool, rng, profiler)
+        with phase('record'):
+            res[i] = pool.ravel()
+        if profiler is not None:
+            profiler.end_generation(i)
+    return res
+
+
+def powers_model(pop=4000, large_g=40, small_g=4, disposal_limit=4, large_r=50, small_r=4, self_g=0.02,
+                 coop_g=0.018, self_c=0.2, coop_c=0.1, K=0.1, mutation_rate=0.0):
+    '''
+    Model used in "Individual Selection for Cooperative Group Formation":
+    two size classes (Large and Small) and two strategies (Selfish and
+    Cooperative).
+    '''
+    return Model([('L', large_g, large_r), ('S', small_g, small_r)],
+                 [('S', self_g, self_c), ('C', coop_g, coop_c)],
+                 pop=pop, disposal_limit=disposal_limit, K=K, mutation_rate=mutation_rate)
+
+
+def tree_groups_model(pop=4000, large_g=40, small_g=4, medium_g=22, disposal_limit=4, large_r=50, small_r=4,
+                      medium_r=27, self_g=0.02, coop_g=0.018, self_c=0.2, coop_c=0.1, K=0.1, mutation_rate=0.0):
+    '''
+    Extension of the Powers model with an additional Medium size class.
+    '''
+    return Model([('L', large_g, large_r), ('S', small_g, small_r), ('M', medium_g, medium_r)],
+                 [('S', self_g, self_c), ('C', coop_g, coop_c)],
+                 pop=pop, disposal_limit=disposal_limit, K=K, mutation_rate=mutation_rate)
+
+
+def selfishness_levels(n_levels=4, self_g=0.02, coop_g=0.018, self_c=0.2, coop_c=0.1, step=0.2):
+    '''
+    Creating a table of n_levels strategies going from Selfish (level 0) to
+    Cooperative (level n_levels - 1). The intermediate levels have the
+    selfish growth and consumption rates divided by 1 + step * level
+    (eg. 1.2 and 1.4 for the Quite Selfish and Quite Cooperative levels).
+    '''
+    levels = [(str(i), self_g / (1 + step * i), self_c / (1 + step * i)) for i in range(n_levels - 1)]
+    return levels + [(str(n_levels - 1), coop_g, coop_c)]
+
+
+def selfishness_model(pop=4000, n_levels=4, large_g=40, small_g=4, disposal_limit=4, large_r=50, small_r=4,
+                      self_g=0.02, coop_g=0.018, self_c=0.2, coop_c=0.1, K=0.1, mutation_rate=0.5):
+    '''
+    Extension of the Powers model with multiple levels of selfishness
+    (0 -> Selfish, 1 -> Quite Selfish, 2 -> Quite Cooperative,
+    3 -> Cooperative for the default four levels).
+    '''
+    return Model([('L', large_g, large_r), ('S', small_g, small_r)],
+                 selfishness_levels(n_levels, self_g, coop_g, self_c, coop_c),
+                 pop=pop, disposal_limit=disposal_limit, K=K, mutation_rate=mutation_rate)
@@ -0,0 +1,55 @@
+import numpy as np
+
+
+def uniform_matrix(n):
+    '''
+    Transition matrix in which a mutant gets any of the n states with the
+    same probability (including the one it had before mutating).
+    '''
+    return np.full((n, n), 1 / n)
+
+
+def transition_matrices(shape, strategy_matrix=None, size_matrix=None):
+    '''
+    Filling in the default transition matrices for a population of the
+    given (n_sizes, n_strategies) shape: mutants get a uniformly random
+    strategy and keep their size preference unless matrices are given.
+    Row j of strategy_matrix (size_matrix) contains the probabilities of a
+    mutant of strategy (size) j of getting each of the strategies (sizes).
+    '''
+    n_sizes, n_strategies = shape
+    if strategy_matrix is None:
+        strategy_matrix = uniform_matrix(n_strategies)
+    if size_matrix is None:
+        size_matrix = np.eye(n_sizes)
+    return np.asarray(strategy_matrix, dtype=float), np.asarray(size_matrix, dtype=float)
+
+
+def mutate(pool, rate, rng, strategy_matrix=None, size_matrix=None):
+    '''
+    Applying mutation to a (n_sizes, n_strategies) pool of counts. Every
+    individual mutates with probability rate, so the number of mutants of
+    every genotype is drawn from a binomial distribution, and the mutants
+    are then redistributed among the strategies (and the sizes) with one
+    multinomial draw per row of the transition matrices. The cost depends
+    only on the number of genotypes and not on the population size.
+    '''
+    if rate == 0:
+        return pool
+    strategy_matrix, size_matrix = transition_matrices(pool.shape, strategy_matrix, size_matrix)
+    mutants = rng.binomial(pool, rate)
+    res = pool - mutants
+    mutants = sum(rng.multinomial(mutants[:, j], strategy_matrix[j]) for j in range(pool.shape[1]))
+    mutants = sum(rng.multinomial(mutants[i], size_matrix[i]).T for i in range(pool.shape[0]))
+    return res + mutants
+
+
+def expected_mutation(freqs, rate, strategy_matrix=None, size_matrix=None):
+    '''
+    Expected effect of mutate on a (n_sizes, n_strategies) matrix of
+    genotype frequencies.
+    '''
+    if rate == 0:
+        return freqs
+    strategy_matrix, size_matrix = transition_matrices(freqs.shape, strategy_matrix, size_matrix)
+    return (1 - rate) * freqs + rate * size_matrix.T @ freqs @ strategy_matrix
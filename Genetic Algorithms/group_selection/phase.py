@@ -0,0 +1,181 @@
+'''
+Locating the boundary between selfish-dominant and cooperative-dominant
+outcomes in parameter space with as few simulations as possible: the
+outcome of a parameter point is decided by sequential sampling (replicates
+are added only while the outcome is uncertain), a single parameter is
+searched by bisection and a two parameter phase diagram is mapped by
+recursively refining only the cells whose corners disagree.
+'''
+from collections import namedtuple
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from .simulation import build_model, simulate
+
+Outcome = namedtuple('Outcome', ['params', 'label', 'cooperation', 'wins', 'n'])
+PhaseMap = namedtuple('PhaseMap', ['x', 'y', 'labels', 'outcomes', 'n_simulations'])
+
+COOPERATIVE = 'cooperative'
+SELFISH = 'selfish'
+UNCERTAIN = 'uncertain'
+
+
+def cooperation(result):
+    '''
+    Final global frequency of the most cooperative strategy (the last
+    strategy of the model, whatever the size preference).
+    '''
+    freqs = result.frequencies()[-1]
+    n_strategies = build_model(result.config).shape[1]
+    return freqs.reshape(-1, n_strategies)[:, -1].sum()
+
+
+def wilson_interval(wins, n, confidence=0.95):
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = wins / n
+    centre = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+    half_width = z * math.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / (1 + z ** 2 / n)
+    return centre - half_width, centre + half_width
+
+
+class Classifier:
+    '''
+    Deciding whether cooperation wins at a parameter point. base is a
+    simulate config (model, iter_num, mode and fixed parameters) which is
+    updated with the parameters of every point.
+
+    In stochastic mode a replicate is a cooperative win when the final
+    frequency of the cooperative strategy is above threshold. Replicates
+    are run in batches of batch until the Wilson interval of the
+    probability of a cooperative win excludes 1/2, or max_replicates is
+    reached (the outcome is then 'uncertain'). Replicate k of every point
+    uses the seed [seed, k], so neighbouring points are compared with
+    common random numbers. In expected mode a single deterministic run
+    decides the outcome.
+
+    n_simulations counts the simulations actually run.
+    '''
+
+    def __init__(self, base, threshold=0.5, batch=5, max_replicates=40, confidence=0.95, seed=0, cache=None):
+        if max_replicates < 1 or batch < 1:
+            raise ValueError('batch and max_replicates must be at least 1')
+        self.base = dict(base)
+        self.threshold = threshold
+        self.batch = batch
+        self.max_replicates = max_replicates
+        self.confidence = confidence
+        self.seed = seed
+        self.cache = cache
+        self.n_simulations = 0
+
+    def _cooperation(self, params, k):
+        config = dict(self.base, **params)
+        if config.get('mode') != 'expected':
+            config['seed'] = [self.seed, k]
+        self.n_simulations += 1
+        return cooperation(simulate(config, self.cache))
+
+    def __call__(self, params):
+        if self.base.get('mode') == 'expected':
+            coop = self._cooperation(params, 0)
+            label = COOPERATIVE if coop > self.threshold else SELFISH
+            return Outcome(params, label, coop, int(coop > self.threshold), 1)
+        values = []
+        label = UNCERTAIN
+        while len(values) < self.max_replicates:
+            values += [self._cooperation(params, k)
+                       for k in range(len(values), min(len(values) + self.batch, self.max_replicates))]
+            wins = sum(v > self.threshold for v in values)
+            lower, upper = wilson_interval(wins, len(values), self.confidence)
+            if lower > 0.5:
+                label = COOPERATIVE
+                break
+            if upper < 0.5:
+                label = SELFISH
+                break
+        return Outcome(params, label, float(np.mean(values)), int(wins), len(values))
+
+
+def bisect_boundary(classify, name, low, high, tol=None):
+    '''
+    Bisecting the parameter name between low and high (with the outcome
+    assumed to change only once in between) until the bracket is narrower
+    than tol (1 for integer parameters, 1/100 of the range otherwise) or a
+    point with an uncertain outcome, which lies on the boundary, is found.
+    The outcomes of the two ends of the final bracket are returned.
+    '''
+    integer = isinstance(low, (int, np.integer)) and isinstance(high, (int, np.integer))
+    if tol is None:
+        tol = 1 if integer else abs(high - low) / 100
+    lo, hi = classify({name: low}), classify({name: high})
+    if lo.label == hi.label and lo.label != UNCERTAIN:
+        raise ValueError('{} has the same outcome ({}) at both ends of [{}, {}]'.format(name, lo.label, low, high))
+    while abs(hi.params[name] - lo.params[name]) > tol and UNCERTAIN not in (lo.label, hi.label):
+        a, b = lo.params[name], hi.params[name]
+        mid = (a + b) // 2 if integer else (a + b) / 2
+        if mid in (a, b):
+            break
+        res = classify({name: mid})
+        if res.label == UNCERTAIN:
+            return res, res
+        if res.label == lo.label:
+            lo = res
+        else:
+            hi = res
+    return lo, hi
+
+
+def map_phases(classify, x_name, x_values, y_name=None, y_values=None, coarse=5):
+    '''
+    Mapping the outcome over the grid x_values (times y_values for two
+    parameters). The grid is first sampled at about coarse points per
+    axis; every coarse cell whose corners all have the same (certain)
+    outcome is filled without further simulations, while the others are
+    split in half along each axis and refined recursively, so only the
+    cells around the phase boundary are simulated at full resolution.
+
+    A PhaseMap is returned: labels is a (len(x_values), len(y_values))
+    array of outcome labels, outcomes maps the grid indices actually
+    simulated to their Outcome and n_simulations is the number of
+    simulations run.
+    '''
+    x_values = list(x_values)
+    y_values = [None] if y_name is None else list(y_values)
+    shape = (len(x_values), len(y_values))
+    labels = np.full(shape, '', dtype=object)
+    outcomes = {}
+    start = classify.n_simulations
+
+    def evaluate(i, j):
+        if (i, j) not in outcomes:
+            params = {x_name: x_values[i]}
+            if y_name is not None:
+                params[y_name] = y_values[j]
+            outcomes[i, j] = classify(params)
+            labels[i, j] = outcomes[i, j].label
+        return outcomes[i, j].label
+
+    def ticks(n):
+        step = max((n - 1) // max(coarse - 1, 1), 1)
+        return sorted(set(range(0, n, step)) | {n - 1})
+
+    xs, ys = ticks(shape[0]), ticks(shape[1])
+    cells = [(i0, i1, j0, j1) for i0, i1 in zip(xs, xs[1:] or xs) for j0, j1 in zip(ys, ys[1:] or ys)]
+    while cells:
+        i0, i1, j0, j1 = cells.pop()
+        corners = {evaluate(i, j) for i in (i0, i1) for j in (j0, j1)}
+        if len(corners) == 1 and UNCERTAIN not in corners:
+            block = labels[i0:i1 + 1, j0:j1 + 1]
+            block[block == ''] = corners.pop()
+            continue
+        im, jm = (i0 + i1) // 2, (j0 + j1) // 2
+        isplit = [(i0, im), (im, i1)] if i1 - i0 > 1 else [(i0, i1)]
+        jsplit = [(j0, jm), (jm, j1)] if j1 - j0 > 1 else [(j0, j1)]
+        if len(isplit) == len(jsplit) == 1:
+            continue
+        cells += [(a, b, c, d) for a, b in isplit for c, d in jsplit]
+    if y_name is None:
+        y_values = None
+    return PhaseMap(x_values, y_values, labels, outcomes, classify.n_simulations - start)
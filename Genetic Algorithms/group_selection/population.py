@@ -0,0 +1,201 @@
+import numpy as np
+
+
+def create_pool(size, n_sizes, n_strategies):
+    '''
+    Creating an initial population in which every genotype (combination of
+    group size class and strategy) is equally represented. Instead of
+    storing one string per individual, the population is stored as a
+    (n_sizes, n_strategies) matrix of counts: row i contains the number of
+    individuals of each strategy preferring the i-th group size.
+    '''
+    per_genotype = int(size / (n_sizes * n_strategies))
+    return np.full((n_sizes, n_strategies), per_genotype, dtype=np.int64)
+
+
+class Fixed:
+    '''
+    Groups of size individuals. Unlike a plain integer group size (for
+    which the individuals which do not fill a complete group are
+    discarded, as in the original model) the remaining individuals form a
+    last smaller group.
+    '''
+
+    def __init__(self, size):
+        self.size = int(size)
+        self.max_size = self.size
+
+    def draw(self, total, rng):
+        sizes = np.full(total // self.size, self.size, dtype=np.int64)
+        if total % self.size:
+            sizes = np.append(sizes, total % self.size)
+        return sizes
+
+    def __repr__(self):
+        return 'Fixed({})'.format(self.size)
+
+
+class _Distribution:
+    '''
+    Base class of the random group sizes: sizes are drawn in batches until
+    they cover total individuals, and the last group is truncated so that
+    every individual is assigned to exactly one group.
+    '''
+
+    def sample(self, n, rng):
+        raise NotImplementedError
+
+    def draw(self, total, rng):
+        sizes = np.zeros(0, dtype=np.int64)
+        if total == 0:
+            return sizes
+        while sizes.sum() < total:
+            n = int((total - sizes.sum()) / self.mean) + 16
+            sizes = np.concatenate([sizes, self.sample(n, rng)])
+        ends = np.cumsum(sizes)
+        last = int(np.searchsorted(ends, total))
+        sizes = sizes[:last + 1]
+        sizes[-1] -= ends[last] - total
+        return sizes
+
+
+class Poisson(_Distribution):
+    '''
+    Poisson distributed group sizes with the given mean, clipped to
+    [min_size, max_size] (max_size=None leaves them unbounded).
+    '''
+
+    def __init__(self, mean, min_size=1, max_size=None):
+        if mean <= 0:
+            raise ValueError('The mean group size must be positive')
+        self.mean = mean
+        self.min_size = min_size
+        self.max_size = max_size
+
+    def sample(self, n, rng):
+        sizes = np.maximum(rng.poisson(self.mean, n), self.min_size)
+        return sizes if self.max_size is None else np.minimum(sizes, self.max_size)
+
+    def __repr__(self):
+        return 'Poisson({}, min_size={}, max_size={})'.format(self.mean, self.min_size, self.max_size)
+
+
+class Empirical(_Distribution):
+    '''
+    Group sizes drawn from the observed sizes (with the given weights, or
+    uniformly).
+    '''
+
+    def __init__(self, sizes, weights=None):
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        if self.sizes.min() < 1:
+            raise ValueError('Group sizes must be positive')
+        self.weights = None if weights is None else np.asarray(weights, dtype=float) / np.sum(weights)
+        self.mean = float(np.average(self.sizes, weights=self.weights))
+        self.max_size = int(self.sizes.max())
+
+    def sample(self, n, rng):
+        return rng.choice(self.sizes, n, p=self.weights)
+
+    def __repr__(self):
+        weights = None if self.weights is None else self.weights.tolist()
+        return 'Empirical({}, weights={})'.format(self.sizes.tolist(), weights)
+
+
+def group_size(spec):
+    '''
+    Converting a group size specification to what split_class expects: an
+    integer (fixed size, leftovers discarded), a distribution, or a tuple
+    naming one, eg. ('fixed', 4), ('poisson', 4) or
+    ('empirical', [3, 4, 5], [0.2, 0.5, 0.3]), so that group sizes can be
+    given in plain configs and on the command line.
+    '''
+    if isinstance(spec, (tuple, list)):
+        kinds = {'fixed': Fixed, 'poisson': Poisson, 'empirical': Empirical}
+        if spec[0] not in kinds:
+            raise ValueError('Unknown group size distribution: {}'.format(spec[0]))
+        return kinds[spec[0]](*spec[1:])
+    return spec
+
+
+def size_limit(group_size, groups):
+    '''
+    Largest possible size of the groups of a class: the fixed size, the
+    maximum of the distribution or, if it is unbounded, of the groups
+    formed.
+    '''
+    limit = getattr(group_size, 'max_size', group_size)
+    if limit is None:
+        limit = int(np.asarray(groups).sum(axis=1).max(initial=0))
+    return int(limit)
+
+
+def split_class(counts, group_size, rng, replace=False):
+    '''
+    Splitting all the individuals of one size class into groups of
+    group_size individuals. The result is a (n_groups, n_strategies) matrix
+    where each row contains the composition of one group.
+
+    group_size can also be a distribution (Fixed, Poisson or Empirical):
+    the group sizes are then drawn so that they add up to the size of the
+    class, and every individual is assigned to a group of its own size
+    (the rows of the result having different sums).
+
+    With replace=False the groups are an exact random partition of the
+    individuals (as if the pool was shuffled and reshaped): the individuals
+    which do not fill a complete group are discarded first, and then the
+    strategies are dealt into the groups one at a time using multivariate
+    hypergeometric draws over the free slots of every group. With
+    replace=True every group is instead drawn independently from the
+    strategy frequencies of the class (multinomial sampling).
+    '''
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    if hasattr(group_size, 'draw'):
+        return _split_ragged(counts, group_size.draw(total, rng), rng, replace)
+    n_groups = total // group_size
+    kept = counts
+    if not replace and n_groups * group_size != total:
+        kept = rng.multivariate_hypergeometric(counts, n_groups * group_size)
+    return _split_ragged(kept, np.full(n_groups, group_size, dtype=np.int64), rng, replace)
+
+
+def _split_ragged(counts, sizes, rng, replace):
+    groups = np.zeros((len(sizes), counts.size), dtype=np.int64)
+    if len(sizes) == 0:
+        return groups
+    if replace:
+        return rng.multinomial(sizes, counts / counts.sum()).reshape(len(sizes), counts.size)
+    free = sizes.copy()
+    for j in range(counts.size - 1):
+        if counts[j] == 0:
+            continue
+        groups[:, j] = rng.multivariate_hypergeometric(free, counts[j], method='marginals')
+        free -= groups[:, j]
+    groups[:, -1] = free
+    return groups
+
+
+def divide_in_groups(pool, group_sizes, rng, replace=False):
+    '''
+    Dividing the current population into one division for each size class
+    and splitting every division in groups of the corresponding size (see
+    split_class). With integer group sizes, the individuals left over
+    after filling the last complete group are discarded. Each generation
+    costs O(#groups x #strategies) regardless of the population size.
+    '''
+    return [split_class(counts, g, rng, replace) for counts, g in zip(pool, group_sizes)]
+
+
+def update_pool(groups, pop):
+    '''
+    In this case, are taken as input the divisions which had undergone
+    reproduction and are merged together to create a pool like the one
+    created in the initialization step. The overall population size is
+    brought back to pop keeping the genotype frequencies unchanged.
+    '''
+    res = np.array([g.sum(axis=0) for g in groups], dtype=np.int64)
+    total = res.sum()
+    if total == 0:
+        return res
+    return (res / total * pop).astype(np.int64)
@@ -0,0 +1,156 @@
+import numpy as np
+
+
+def replicate(groups, disposal_limit, r, g, c, K):
+    '''
+    Running the replicator equations for disposal_limit time steps on every
+    group at once. groups is a (n_groups, n_strategies) matrix of counts,
+    r is the group resource (a scalar or one value per group), g and c are
+    the growth and consumption rates of every strategy and K is the death
+    rate (a scalar or one value per strategy). At every step each genotype
+    receives a share of the group resource proportional to n_i * g_i * c_i:
+
+    R_i = (n_i * g_i * c_i) / sum_j(n_j * g_j * c_j) * R
+    n_i = n_i + R_i / c_i - K * n_i
+
+    The number of individuals of every strategy in every group at disposal
+    is returned as an integer matrix of the same shape as groups.
+    '''
+    n = np.asarray(groups, dtype=float)
+    r = np.asarray(r, dtype=float)
+    if r.ndim == 1:
+        r = r[:, None]
+    g = np.asarray(g, dtype=float)
+    c = np.asarray(c, dtype=float)
+    gc = g * c
+    for _ in range(disposal_limit):
+        share = n * gc
+        total = share.sum(axis=1, keepdims=True)
+        share = np.divide(share, total, out=np.zeros_like(share), where=total > 0)
+        n = n + share * r / c - K * n
+    return n.astype(np.int64)
+
+
+# Dormand-Prince 5(4) coefficients
+_DP_A = [[],
+         [1 / 5],
+         [3 / 40, 9 / 40],
+         [44 / 45, -56 / 15, 32 / 9],
+         [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+         [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+         [35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84]]
+_DP_B5 = np.array([35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0])
+_DP_B4 = np.array([5179 / 57600, 0, 7571 / 16695, 393 / 640, -92097 / 339200, 187 / 2100, 1 / 40])
+
+
+def _initial_step(f, n, r, disposal_time, rtol, atol):
+    '''
+    Initial step size of every group with the usual heuristic for explicit
+    Runge-Kutta methods of order 5 (Hairer, Norsett and Wanner, Solving
+    Ordinary Differential Equations I, II.4), so that the first step
+    already has a local error close to the tolerance.
+    '''
+    if n.size == 0:
+        return np.zeros(len(n))
+    scale = atol + rtol * np.abs(n)
+    f0 = f(n, r)
+    d0 = np.sqrt(np.mean((n / scale) ** 2, axis=1))
+    d1 = np.sqrt(np.mean((f0 / scale) ** 2, axis=1))
+    h0 = np.where((d0 < 1e-5) | (d1 < 1e-5), 1e-6, 0.01 * d0 / np.maximum(d1, 1e-300))
+    f1 = f(n + h0[:, None] * f0, r)
+    d2 = np.sqrt(np.mean(((f1 - f0) / scale) ** 2, axis=1)) / h0
+    d = np.maximum(d1, d2)
+    h1 = np.where(d <= 1e-15, np.maximum(1e-6, h0 * 1e-3), (0.01 / np.maximum(d, 1e-300)) ** 0.2)
+    return np.minimum(np.minimum(100 * h0, h1), disposal_time)
+
+
+def integrate(groups, disposal_time, r, g, c, K, rtol=1e-6, atol=1e-9, return_steps=False):
+    '''
+    Continuous time version of replicate: the replicator equations
+
+    dn_i/dt = (n_i * g_i * c_i) / sum_j(n_j * g_j * c_j) * R / c_i - K * n_i
+
+    are integrated from 0 to disposal_time for every group at once with an
+    adaptive Dormand-Prince 5(4) solver. Every group has its own step size,
+    accepted or rejected so that its estimated local error stays below
+    atol + rtol * |n|, so the outcome of a group does not depend on the
+    other groups integrated with it. Long disposal times therefore cost a
+    handful of solver steps instead of one step per time unit. The number
+    of individuals of every strategy in every group at disposal is
+    returned (and the largest number of accepted steps of a group if
+    return_steps is True).
+
+    rtol is a local tolerance on every step, and the first step is chosen
+    by the usual initial step heuristic, so the error at disposal is of
+    the order of rtol (about 3e-3 at rtol=1e-3 over 20 time units). This
+    error is measured against the differential equations, not against
+    the discrete update of replicate: the two models differ (by about 15%
+    at disposal_limit=4).
+    '''
+    n = np.array(groups, dtype=float)
+    r = np.broadcast_to(np.asarray(r, dtype=float).reshape(-1, 1), (len(n), 1))
+    g = np.asarray(g, dtype=float)
+    c = np.asarray(c, dtype=float)
+    gc = g * c
+
+    def f(y, r):
+        share = y * gc
+        total = share.sum(axis=1, keepdims=True)
+        share = np.divide(share, total, out=np.zeros_like(share), where=total > 0)
+        return share * r / c - K * y
+
+    t = np.zeros(len(n))
+    h = _initial_step(f, n, r, disposal_time, rtol, atol)
+    steps = np.zeros(len(n), dtype=np.int64)
+    active = np.arange(len(n)) if n.size else np.zeros(0, dtype=np.int64)
+    k = [None] * 7
+    while active.size:
+        y, ry = n[active], r[active]
+        remaining = disposal_time - t[active]
+        hh = np.minimum(h[active], remaining)[:, None]
+        k[0] = f(y, ry)
+        for i in range(1, 7):
+            k[i] = f(y + hh * sum(a * k[j] for j, a in enumerate(_DP_A[i]) if a != 0), ry)
+        n5 = y + hh * sum(b * k[i] for i, b in enumerate(_DP_B5) if b != 0)
+        n4 = y + hh * sum(b * k[i] for i, b in enumerate(_DP_B4) if b != 0)
+        scale = atol + rtol * np.maximum(np.abs(y), np.abs(n5))
+        err = np.max(np.abs(n5 - n4) / scale, axis=1)
+        ok = err <= 1
+        done = active[ok]
+        n[done] = n5[ok]
+        t[done] = np.where(hh[ok, 0] >= remaining[ok], disposal_time, t[done] + hh[ok, 0])
+        steps[done] += 1
+        h[active] = hh[:, 0] * np.clip(0.9 * np.maximum(err, 1e-10) ** -0.2, 0.2, 5.0)
+        active = active[t[active] < disposal_time]
+    res = n.astype(np.int64)
+    steps = int(steps.max(initial=0))
+    return (res, steps) if return_steps else res
+
+
+def advance(groups, disposal_limit, r, g, c, K, method='discrete', rtol=1e-6):
+    '''
+    Advancing groups through the disposal time either with the discrete
+    update of replicate (method='discrete') or with the adaptive
+    continuous time integration of integrate (method='continuous').
+    '''
+    if method == 'discrete':
+        return replicate(groups, disposal_limit, r, g, c, K)
+    if method == 'continuous':
+        return integrate(groups, disposal_limit, r, g, c, K, rtol=rtol)
+    raise ValueError('Unknown replicator method: {}'.format(method))
+
+
+def reproduction(divisions, disposal_limit, r, g, c, K, method='discrete', rtol=1e-6):
+    '''
+    Reproduction takes place just within divisions: divisions is a list with
+    one (n_groups, n_strategies) matrix for each size class and r contains
+    the group resource of each size class. All the groups of all the
+    divisions are stacked and advanced together by a single call to
+    advance, so that the cost depends on the size of the arrays and not on
+    the number of groups iterated in Python.
+    '''
+    lengths = [len(groups) for groups in divisions]
+    n_strategies = len(g)
+    stacked = np.concatenate([np.reshape(groups, (-1, n_strategies)) for groups in divisions])
+    res = advance(stacked, disposal_limit, np.repeat(r, lengths), g, c, K, method, rtol)
+    return np.split(res, np.cumsum(lengths)[:-1])
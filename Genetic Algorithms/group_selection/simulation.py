@@ -0,0 +1,122 @@
+import inspect
+
+import numpy as np
+
+from . import model as models
+from .cache import ResultCache
+from .deterministic import run_expected
+from .individuals import run_individuals
+
+ENGINE_OPTIONS = ('method', 'rtol', 'memoize')
+
+
+class Result:
+    '''
+    Outcome of simulate: values is a (iter_num + 1, n_genotypes) matrix
+    containing the genotype counts (or frequencies for the expected mode)
+    of every generation, with columns following labels. pandas and
+    matplotlib are only imported when to_frame or plot are called.
+    '''
+
+    def __init__(self, config, labels, values):
+        self.config = config
+        self.labels = labels
+        self.values = values
+
+    def frequencies(self):
+        totals = self.values.sum(axis=1, keepdims=True)
+        return np.divide(self.values, totals, out=np.zeros(self.values.shape), where=totals > 0)
+
+    def to_frame(self):
+        import pandas as pd
+        df = pd.DataFrame(self.values, columns=self.labels)
+        df.insert(0, 'Iteration Num', np.arange(len(self.values)))
+        return df
+
+    def plot(self, ax=None):
+        '''
+        Plotting the global frequency of every genotype over the
+        generations.
+        '''
+        import matplotlib.pyplot as plt
+        if ax is None:
+            ax = plt.gca()
+        for label, freq in zip(self.labels, self.frequencies().T):
+            ax.plot(freq, label=label)
+        ax.set_xlabel('Generation', fontsize=16)
+        ax.set_ylabel('Global genotype frequency', fontsize=16)
+        ax.legend(fontsize=12)
+        return ax
+
+
+def build_model(config):
+    '''
+    Creating the model described by config: a dictionary with the name of
+    the model factory in group_selection.model ('model', powers_model by
+    default) and the keyword arguments of the factory. The engine options
+    method, rtol and memoize are set on the model created by the factory,
+    while the simulation options (iter_num, seed and mode) are ignored.
+    '''
+    params = {k: v for k, v in config.items() if k not in ('model', 'iter_num', 'seed', 'mode') + ENGINE_OPTIONS}
+    model = getattr(models, config.get('model', 'powers_model'))(**params)
+    for option in ENGINE_OPTIONS:
+        if option in config:
+            setattr(model, option, config[option])
+    return model
+
+
+def full_config(config):
+    '''
+    Completing config with the default values of the simulation options
+    and of all the parameters of the model factory, so that two configs
+    describing the same simulation are equal.
+    '''
+    res = {'model': 'powers_model', 'iter_num': 120, 'seed': None, 'mode': 'stochastic'}
+    res.update(config)
+    params = {k: v for k, v in res.items() if k not in ('model', 'iter_num', 'seed', 'mode') + ENGINE_OPTIONS}
+    bound = inspect.signature(getattr(models, res['model'])).bind(**params)
+    bound.apply_defaults()
+    res.update(bound.arguments)
+    if res['mode'] == 'expected':
+        res['seed'] = None
+    return res
+
+
+def simulate(config, cache=None):
+    '''
+    Running the simulation described by config, eg.
+
+    simulate({'model': 'powers_model', 'iter_num': 120, 'seed': 0, 'K': 0.2})
+
+    Besides the model parameters (see build_model), config can contain
+    iter_num (120 by default), seed (used to create the numpy Generator)
+    and mode: 'stochastic' (default) for a finite population run,
+    'individual' for the same run with the individual-based engine (see
+    individuals.run_individuals) or 'expected' for the deterministic
+    infinite population limit.
+
+    If cache is a ResultCache (or True for the default one), seeded and
+    expected mode simulations are looked up in it first and stored in it
+    after running. Unseeded stochastic runs are never cached.
+    '''
+    config = full_config(config)
+    if cache is True:
+        cache = ResultCache()
+    cacheable = cache is not None and (config['seed'] is not None or config['mode'] == 'expected')
+    model = build_model(config)
+    values = cache.get(config) if cacheable else None
+    if values is not None:
+        return Result(config, model.labels, values)
+    iter_num = config['iter_num']
+    mode = config['mode']
+    if mode == 'expected':
+        values = run_expected(model, iter_num)
+    elif mode == 'stochastic':
+        values = models.run(model, iter_num, np.random.default_rng(config['seed']))
+    elif mode == 'individual':
+        values = run_individuals(model, iter_num, np.random.default_rng(config['seed']), track_ancestry=False).counts
+    else:
+        raise ValueError('Unknown simulation mode: {}'.format(mode))
+    if cacheable:
+        cache.put(config, values)
+    return Result(config, model.labels, values)
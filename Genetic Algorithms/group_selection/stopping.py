@@ -0,0 +1,146 @@
+from collections import deque, namedtuple
+import os
+import pickle
+
+import numpy as np
+
+from .cache import canonical_json
+from .history import History
+from .model import create_pool, generation
+
+Stopped = namedtuple('Stopped', ['history', 'pool', 'generation', 'reason'])
+
+
+class Fixation:
+    '''
+    Stopping when the frequency of a single genotype reaches threshold.
+    '''
+
+    def __init__(self, threshold=1.0):
+        self.threshold = threshold
+
+    def __call__(self, generation, pool):
+        freqs = pool / max(pool.sum(), 1)
+        if freqs.max() >= self.threshold:
+            return 'fixation'
+
+
+class Stationary:
+    '''
+    Stopping when no genotype frequency changed by more than epsilon over
+    the last window generations.
+    '''
+
+    def __init__(self, epsilon=1e-3, window=20):
+        self.epsilon = epsilon
+        self.window = deque(maxlen=window + 1)
+
+    def __call__(self, generation, pool):
+        self.window.append(pool.ravel() / max(pool.sum(), 1))
+        if len(self.window) == self.window.maxlen:
+            freqs = np.array(self.window)
+            if np.max(freqs.max(axis=0) - freqs.min(axis=0)) <= self.epsilon:
+                return 'stationary'
+
+
+class Extinction:
+    '''
+    Stopping when all the individuals with one of the given strategies
+    (column indices of the pool, the most cooperative strategy by default)
+    have disappeared, whatever their size preference.
+    '''
+
+    def __init__(self, strategies=(-1,)):
+        self.strategies = list(strategies)
+
+    def __call__(self, generation, pool):
+        if pool[:, self.strategies].sum() == 0:
+            return 'extinction'
+
+
+def model_description(model):
+    '''
+    Canonical JSON description of every attribute of the model (including
+    the mutation matrices and the engine options), used to check that a
+    checkpoint is resumed with the model which saved it.
+    '''
+    return canonical_json({name: value.tolist() if isinstance(value, np.ndarray) else value
+                           for name, value in vars(model).items()})
+
+
+def save_checkpoint(path, state):
+    '''
+    Saving a checkpoint atomically, so that an interruption while writing
+    never leaves a corrupted checkpoint behind.
+    '''
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def run_until(model, rng, iter_num, criteria=(), checkpoint=None, checkpoint_every=100):
+    '''
+    Running the model for at most iter_num generations, stopping as soon as
+    one of the criteria (callables receiving the generation number and the
+    pool and returning the reason for stopping, or None to continue) is
+    met.
+
+    If checkpoint is a file path, the population, the random number
+    generator, the criteria and the state of the history are saved to it
+    every checkpoint_every generations (and when the run ends). The history
+    itself is flushed to the CSV file checkpoint + '.history.csv' (see
+    History), so every checkpoint only writes the generations recorded
+    since the previous one. If the checkpoint already exists the run is
+    resumed from it instead of restarting from create_pool, and continues
+    exactly as the interrupted run would have (a run which ended because
+    of a criterion is not continued). Resuming with a different model
+    raises a ValueError, while the criteria argument is ignored when
+    resuming: the criteria saved in the checkpoint are used instead, so
+    that stateful criteria (eg. Stationary) keep their state.
+
+    The history, the final pool, the last generation and the reason for
+    stopping ('iter_num' if no criterion was met) are returned.
+    '''
+    if checkpoint is not None and os.path.exists(checkpoint):
+        state = load_checkpoint(checkpoint)
+        if state['model'] != model_description(model):
+            raise ValueError('Checkpoint {} was saved by a different model'.format(checkpoint))
+        history, pool, start, rng, criteria = (state['history'], state['pool'], state['generation'], state['rng'],
+                                               state['criteria'])
+        # Dropping the generations flushed after the checkpoint was saved.
+        with open(history.path, 'r+') as f:
+            f.truncate(state['history_size'])
+        if state['reason'] not in (None, 'iter_num') or start >= iter_num:
+            return Stopped(history, pool, start, state['reason'])
+    else:
+        pool = create_pool(model)
+        start = 0
+        history = History(model.labels, path=None if checkpoint is None else checkpoint + '.history.csv')
+        history.record(0, pool)
+
+    def save(i, reason):
+        if checkpoint is not None:
+            history.flush()
+            save_checkpoint(checkpoint, {'model': model_description(model), 'history': history,
+                                         'history_size': os.path.getsize(history.path), 'pool': pool,
+                                         'generation': i, 'rng': rng, 'criteria': criteria, 'reason': reason})
+
+    i = start
+    reason = 'iter_num'
+    for i in range(start + 1, iter_num + 1):
+        pool = generation(model, pool, rng)
+        history.record(i, pool)
+        stop = next((r for r in (criterion(i, pool) for criterion in criteria) if r is not None), None)
+        if stop is not None:
+            reason = stop
+            break
+        if i % checkpoint_every == 0:
+            save(i, None)
+    save(i, reason)
+    return Stopped(history, pool, i, reason)
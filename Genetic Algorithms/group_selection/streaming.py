@@ -0,0 +1,200 @@
+from collections import deque, namedtuple
+import itertools
+import queue
+import threading
+import time
+
+import numpy as np
+
+from .model import create_pool, generation
+
+Snapshot = namedtuple('Snapshot', ['generation', 'frequencies'])
+
+
+def iter_generations(model, rng, iter_num=None, pool=None, profiler=None):
+    '''
+    Generator running the model one generation at a time and yielding a
+    lightweight Snapshot (generation number and genotype frequencies,
+    following model.labels) after each of them, starting from generation
+    0. Nothing else is kept in memory, so the caller decides what (if
+    anything) to store. With iter_num=None the generator never stops.
+    '''
+    if pool is None:
+        pool = create_pool(model)
+    generations = itertools.count(1) if iter_num is None else range(1, iter_num + 1)
+    yield Snapshot(0, pool.ravel() / max(pool.sum(), 1))
+    for i in generations:
+        pool = generation(model, pool, rng, profiler)
+        if profiler is not None:
+            profiler.end_generation(i)
+        yield Snapshot(i, pool.ravel() / max(pool.sum(), 1))
+
+
+def _keep(snapshot, last, every, min_change):
+    if snapshot.generation % every != 0:
+        return False
+    return min_change is None or last is None or np.max(np.abs(snapshot.frequencies - last)) > min_change
+
+
+def decimate(snapshots, every=1, min_change=None):
+    '''
+    Filtering a stream of snapshots, keeping only one snapshot every every
+    generations and, if min_change is given, only the snapshots in which
+    some genotype frequency changed by more than min_change since the last
+    snapshot kept.
+    '''
+    last = None
+    for snap in snapshots:
+        if _keep(snap, last, every, min_change):
+            last = snap.frequencies
+            yield snap
+
+
+class LivePlot:
+    '''
+    Consumer plotting a stream of snapshots. Snapshots which are not kept
+    by the decimation (every, min_change) are dropped immediately by
+    submit. Only the last maxlen points of every line are kept, so memory
+    stays bounded however long the run is.
+
+    When an interactive matplotlib backend is active (or show=True) the
+    figure is displayed and, since GUI toolkits must be driven from the
+    thread which created the figure, redrawn from the thread calling
+    submit: at most once every interval seconds (measured from the end of
+    the previous redraw) and only when new points were added. Otherwise
+    the figure is an Agg figure owned by a background thread, which
+    renders it to path every interval seconds: submit only queues the
+    snapshot (dropping the oldest pending ones if the thread falls
+    behind), so the simulation loop never waits for a rendering.
+    '''
+
+    def __init__(self, labels, every=1, min_change=None, maxlen=10000, interval=0.5, path=None, show=None):
+        self.labels = labels
+        self.every = every
+        self.min_change = min_change
+        self.interval = interval
+        self.path = path
+        self.show = show
+        self.generations = deque(maxlen=maxlen)
+        self.frequencies = deque(maxlen=maxlen)
+        self._last = None
+        self._queue = queue.Queue(maxsize=1024)
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_draw = 0.0
+        self._dirty = False
+        self.fig = None
+
+    def submit(self, snapshot):
+        if not _keep(snapshot, self._last, self.every, self.min_change):
+            return
+        self._last = snapshot.frequencies
+        if self._thread is None:
+            self.generations.append(snapshot.generation)
+            self.frequencies.append(snapshot.frequencies)
+            self._dirty = True
+            self.poll()
+            return
+        while True:
+            try:
+                self._queue.put_nowait(snapshot)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def poll(self):
+        '''
+        Redrawing a displayed figure if new points were added and at least
+        interval seconds passed since the last redraw. It must be called
+        from the thread which started the plot (submit calls it).
+        '''
+        if self._thread is None and self._dirty and time.monotonic() - self._last_draw >= self.interval:
+            self.draw()
+
+    def _setup(self, fig):
+        self.fig = fig
+        self.ax = fig.add_subplot()
+        self.lines = [self.ax.plot([], [], label=label)[0] for label in self.labels]
+        self.ax.set_xlabel('Generation', fontsize=16)
+        self.ax.set_ylabel('Global genotype frequency', fontsize=16)
+        self.ax.set_ylim(0, 1)
+        self.ax.legend(fontsize=12)
+
+    def start(self):
+        if self.show is not False:
+            import matplotlib.pyplot as plt
+            fig = plt.figure()
+            if self.show or fig.canvas.required_interactive_framework is not None:
+                self._setup(fig)
+                plt.show(block=False)
+                return self
+            plt.close(fig)
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        else:
+            self.draw()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _drain(self):
+        while True:
+            try:
+                snap = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self.generations.append(snap.generation)
+            self.frequencies.append(snap.frequencies)
+            self._dirty = True
+
+    def _loop(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        self._setup(fig)
+        while not self._stop.wait(self.interval):
+            self._drain()
+            if self._dirty:
+                self.draw()
+        self._drain()
+        self.draw()
+
+    def draw(self):
+        if self.fig is None or not self.generations:
+            return
+        freqs = np.array(self.frequencies)
+        for line, column in zip(self.lines, freqs.T):
+            line.set_data(self.generations, column)
+        self.ax.set_xlim(self.generations[0], max(self.generations[-1], self.generations[0] + 1))
+        if self._thread is None:
+            self.fig.canvas.draw_idle()
+            self.fig.canvas.flush_events()
+        if self.path is not None:
+            self.fig.savefig(self.path)
+        self._dirty = False
+        self._last_draw = time.monotonic()
+
+
+def monitor(model, rng, iter_num, **plot_options):
+    '''
+    Running the model for iter_num generations while plotting the genotype
+    frequencies live (see LivePlot for the plot options). The final
+    snapshot is returned.
+    '''
+    with LivePlot(model.labels, **plot_options) as plot:
+        for snap in iter_generations(model, rng, iter_num):
+            plot.submit(snap)
+    return snap
@@ -0,0 +1,101 @@
+import functools
+import itertools
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+from .cache import canonical_json, config_hash
+from .simulation import simulate
+
+
+def expand_grid(**params):
+    '''
+    Expanding a parameter grid into the list of all its points. Every
+    keyword is a model parameter (eg. large_g, small_r, disposal_limit, K,
+    mutation_rate or seed) and its value is the list of values to explore:
+
+    expand_grid(large_g=[20, 40], seed=range(3)) -> 6 points
+    '''
+    names = sorted(params)
+    values = [list(params[n]) if np.iterable(params[n]) else [params[n]] for n in names]
+    return [dict(zip(names, v)) for v in itertools.product(*values)]
+
+
+def point_key(params):
+    '''
+    Hash identifying a sweep point: two points with the same parameters
+    always have the same key, whatever the order of the parameters.
+    '''
+    return config_hash(params)
+
+
+class SweepStore:
+    '''
+    On-disk store of the completed sweep points. Every point is saved in
+    its own .npz file named after the hash of its parameters (the genotype
+    counts of every generation plus the parameters themselves), so a sweep
+    which is interrupted can be resumed without recomputing the points
+    which had already been completed.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, params):
+        return os.path.join(self.path, point_key(params) + '.npz')
+
+    def __contains__(self, params):
+        return os.path.exists(self._file(params))
+
+    def save(self, params, counts):
+        fname = self._file(params)
+        tmp = fname + '.tmp.npz'
+        np.savez_compressed(tmp, counts=counts, params=canonical_json(params))
+        os.replace(tmp, fname)
+
+    def load(self, params):
+        with np.load(self._file(params)) as data:
+            return data['counts']
+
+    def items(self):
+        '''
+        Iterating over all the stored points as (params, counts) pairs.
+        '''
+        for fname in sorted(os.listdir(self.path)):
+            if fname.endswith('.npz') and not fname.endswith('.tmp.npz'):
+                with np.load(os.path.join(self.path, fname)) as data:
+                    yield json.loads(str(data['params'])), data['counts']
+
+
+def _run_point(point, cache=None):
+    return point, simulate(point, cache).values
+
+
+def run_sweep(grid, store, iter_num=120, model='powers_model', processes=None, cache=None):
+    '''
+    Running every point of grid (as returned by expand_grid) which is not
+    already in store, scheduling the points over a pool of worker
+    processes. Every point is run by simulation.simulate, with model the
+    name of the model factory in group_selection.model receiving the point
+    parameters (seed is used to seed the numpy Generator of the point).
+    Each point is saved as soon as it completes. If cache is given (see
+    simulation.simulate), the points are also looked up in and added to
+    the shared result cache. The list of the points of the grid, with
+    model and iter_num added, is returned so that their results can be
+    loaded from the store.
+    '''
+    if not isinstance(store, SweepStore):
+        store = SweepStore(store)
+    points = [dict(p, model=model, iter_num=iter_num) for p in grid]
+    pending = [p for p in points if p not in store]
+    if processes == 1:
+        for p in pending:
+            store.save(*_run_point(p, cache))
+        return points
+    with multiprocessing.Pool(processes) as pool:
+        for p, counts in pool.imap_unordered(functools.partial(_run_point, cache=cache), pending):
+            store.save(p, counts)
+    return points
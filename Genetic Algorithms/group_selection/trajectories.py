@@ -0,0 +1,196 @@
+'''
+Memory-mapped on-disk format for large (replicate, generation, genotype)
+datasets of trajectories.
+
+A trajectory file starts with a small header (magic string, header length
+and a JSON document with the labels, the number of generations of every
+replicate, the dtype and any user metadata) padded to 64 bytes, followed by
+the counts stored as a C-ordered (replicate, generation, genotype) array.
+Writers append rows incrementally at the end of the file and readers
+memory map the complete replicates, so slicing them never loads the whole
+dataset in memory.
+'''
+import json
+import multiprocessing
+import os
+import struct
+from statistics import NormalDist
+
+import numpy as np
+
+from .ensemble import Ensemble, _replicate
+
+MAGIC = b'GSTRAJ01'
+_ALIGN = 64
+
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a trajectory file')
+    (length,) = struct.unpack('<Q', f.read(8))
+    meta = json.loads(f.read(length).rstrip(b' ').decode())
+    return meta, len(MAGIC) + 8 + length
+
+
+class TrajectoryWriter:
+    '''
+    Writer appending trajectories to a trajectory file. rows can be a
+    single generation (n_genotypes,), a block of generations
+    (k, n_genotypes) or whole replicates (k, n_generations, n_genotypes);
+    rows are written in order, so a replicate is complete once
+    n_generations rows have been appended after the previous one. If the
+    file already exists new replicates are appended to it (its labels and
+    number of generations must match, and any incomplete replicate left at
+    its end by an interrupted writer is discarded).
+    '''
+
+    def __init__(self, path, labels, n_generations, dtype='int64', metadata=None):
+        self.path = path
+        self.labels = list(labels)
+        self.n_generations = n_generations
+        self.dtype = np.dtype(dtype)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                meta, self.offset = _read_header(f)
+            if meta['labels'] != self.labels or meta['n_generations'] != n_generations:
+                raise ValueError('Existing trajectory file {} has a different layout'.format(path))
+            self.dtype = np.dtype(meta['dtype'])
+            self._file = open(path, 'r+b')
+            replicate_bytes = n_generations * len(self.labels) * self.dtype.itemsize
+            # Dropping any partially written replicate left by an interrupted
+            # writer, so that the new replicates start at a replicate boundary.
+            size = os.path.getsize(path) - self.offset
+            self._file.truncate(self.offset + size // replicate_bytes * replicate_bytes)
+            self._file.seek(0, os.SEEK_END)
+        else:
+            meta = {'labels': self.labels, 'n_generations': n_generations, 'dtype': self.dtype.str,
+                    'metadata': metadata or {}}
+            text = json.dumps(meta).encode()
+            length = -(-(len(MAGIC) + 8 + len(text)) // _ALIGN) * _ALIGN - len(MAGIC) - 8
+            self._file = open(path, 'wb')
+            self._file.write(MAGIC + struct.pack('<Q', length) + text.ljust(length))
+            self.offset = len(MAGIC) + 8 + length
+
+    def append(self, rows):
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        if rows.shape[-1] != len(self.labels):
+            raise ValueError('Expected {} genotypes, got {}'.format(len(self.labels), rows.shape[-1]))
+        self._file.write(rows.tobytes())
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrajectoryStore:
+    '''
+    Read-only view of a trajectory file: data is a numpy memmap of shape
+    (n_replicates, n_generations, n_genotypes) covering all the complete
+    replicates, so that slices (eg. store.data[:, 100:200]) are read from
+    disk only when accessed.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            meta, offset = _read_header(f)
+        self.labels = meta['labels']
+        self.n_generations = meta['n_generations']
+        self.metadata = meta['metadata']
+        dtype = np.dtype(meta['dtype'])
+        replicate_bytes = self.n_generations * len(self.labels) * dtype.itemsize
+        n_replicates = (os.path.getsize(path) - offset) // replicate_bytes
+        shape = (n_replicates, self.n_generations, len(self.labels))
+        if n_replicates == 0:
+            self.data = np.zeros(shape, dtype=dtype)
+        else:
+            self.data = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+    def __len__(self):
+        return len(self.data)
+
+    def frequencies(self, replicates=slice(None)):
+        counts = self.data[replicates]
+        totals = counts.sum(axis=-1, keepdims=True)
+        return np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0)
+
+    def to_frame(self, replicate):
+        '''
+        Returning one replicate as a DataFrame like the ones created by the
+        notebooks (an 'Iteration Num' column followed by the genotypes).
+        '''
+        import pandas as pd
+        df = pd.DataFrame(np.asarray(self.data[replicate]), columns=self.labels)
+        df.insert(0, 'Iteration Num', np.arange(self.n_generations))
+        return df
+
+    def summarise(self, confidence=0.95, chunk=64):
+        '''
+        Per-generation mean genotype frequencies and confidence interval of
+        the mean over all the replicates (as ensemble.summarise), computed
+        reading chunk replicates at a time.
+        '''
+        n = len(self)
+        total = np.zeros(self.data.shape[1:])
+        total_sq = np.zeros(self.data.shape[1:])
+        for start in range(0, n, chunk):
+            freqs = self.frequencies(slice(start, start + chunk))
+            total += freqs.sum(axis=0)
+            total_sq += (freqs ** 2).sum(axis=0)
+        mean = total / max(n, 1)
+        if n > 1:
+            var = np.maximum(total_sq - n * mean ** 2, 0) / (n - 1)
+            half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * np.sqrt(var / n)
+        else:
+            half_width = np.zeros_like(mean)
+        return Ensemble(mean, mean - half_width, mean + half_width, None)
+
+    def stats(self, chunk=64):
+        '''
+        Mean and standard deviation of the count of every genotype over all
+        the replicates and generations (as the stats function of the
+        notebooks), returned as a dictionary keyed by label.
+        '''
+        n = 0
+        total = np.zeros(len(self.labels))
+        total_sq = np.zeros(len(self.labels))
+        for start in range(0, len(self), chunk):
+            counts = np.asarray(self.data[start:start + chunk], dtype=float).reshape(-1, len(self.labels))
+            n += len(counts)
+            total += counts.sum(axis=0)
+            total_sq += (counts ** 2).sum(axis=0)
+        mean = total / max(n, 1)
+        std = np.sqrt(np.maximum(total_sq / max(n, 1) - mean ** 2, 0))
+        return {label: {'mean': m, 'std': s} for label, m, s in zip(self.labels, mean, std)}
+
+
+def write_ensemble(model, iter_num, path, n_replicates=100, seed=None, processes=None):
+    '''
+    Running n_replicates replicates of the model (seeded as in
+    ensemble.run_ensemble) and appending each of them to the trajectory
+    file at path as soon as it completes, so that the ensemble never needs
+    to fit in memory. The TrajectoryStore of the file is returned.
+    '''
+    seeds = np.random.SeedSequence(seed).spawn(n_replicates)
+    args = [(model, iter_num, s) for s in seeds]
+    with TrajectoryWriter(path, model.labels, iter_num + 1, metadata={'model': repr(model)}) as writer:
+        if processes == 1:
+            for a in args:
+                writer.append(_replicate(*a))
+        else:
+            with multiprocessing.Pool(processes) as p:
+                for counts in p.imap(_star_replicate, args):
+                    writer.append(counts)
+    return TrajectoryStore(path)
+
+
+def _star_replicate(args):
+    return _replicate(*args)
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+
+from group_selection import (Poisson, History, TransitionCache, powers_model, run, run_ensemble, run_islands,
+                             run_individuals, run_until, selfishness_model, split_class)
+from group_selection.model import create_pool, generation
+from group_selection.replicator import replicate, reproduction
+
+
+def original_replicate(coop, selfish, disposal_limit, r, self_g=0.02, coop_g=0.018, self_c=0.2, coop_c=0.1, K=0.1):
+    '''
+    Replicator equations of one group as written in the original scripts.
+    '''
+    for _ in range(disposal_limit):
+        coop_R_i = (coop * coop_g * coop_c) / (coop * coop_g * coop_c + selfish * self_g * self_c) * r
+        self_R_i = (selfish * self_g * self_c) / (selfish * self_g * self_c + coop * coop_g * coop_c) * r
+        coop = coop + coop_R_i / coop_c - K * coop
+        selfish = selfish + self_R_i / self_c - K * selfish
+    return int(selfish), int(coop)
+
+
+def test_split_class_is_an_exact_partition():
+    rng = np.random.default_rng(0)
+    counts = np.array([1003, 998, 17])
+    groups = split_class(counts, 40, rng)
+    assert (groups.sum(axis=1) == 40).all()
+    assert len(groups) == counts.sum() // 40
+    assert (groups.sum(axis=0) <= counts).all()
+    ragged = split_class(counts, Poisson(4), rng)
+    assert (ragged.sum(axis=0) == counts).all()
+    assert (ragged.sum(axis=1) > 0).all()
+
+
+def test_memoized_reproduction_matches_plain_kernel():
+    rng = np.random.default_rng(1)
+    g, c = [0.02, 0.018, 0.016], [0.2, 0.1, 0.15]
+    divisions = [split_class([300, 300, 300], 4, rng), split_class([2000, 2000, 2000], 40, rng)]
+    for method in ('discrete', 'continuous'):
+        # A small table size forces the large groups through the LRU path.
+        cache = TransitionCache(max_table_size=1000)
+        memoized = cache.reproduction(divisions, [4, 40], 20, [4.0, 50.0], g, c, 0.1, method, 1e-3)
+        plain = reproduction(divisions, 20, [4.0, 50.0], g, c, 0.1, method, 1e-3)
+        for a, b in zip(memoized, plain):
+            np.testing.assert_array_equal(a, b)
+
+
+def test_discrete_kernel_matches_original_equations():
+    groups = np.array([[1, 3], [2, 2], [3, 1], [5, 35], [20, 20], [39, 1]])
+    for r in (4.0, 50.0):
+        expected = [original_replicate(coop, selfish, 4, r) for selfish, coop in groups]
+        np.testing.assert_array_equal(replicate(groups, 4, r, [0.02, 0.018], [0.2, 0.1], 0.1), expected)
+
+
+def test_individual_engine_matches_count_engine_in_distribution():
+    model = selfishness_model(pop=1000)
+    n = 200
+    counts = np.array([generation(model, create_pool(model), np.random.default_rng(i)).ravel()
+                       for i in range(n)])
+    individual = np.array([run_individuals(model, 1, np.random.default_rng(i), track_ancestry=False).counts[-1]
+                           for i in range(n)])
+    std_error = np.sqrt(counts.var(axis=0) / n + individual.var(axis=0) / n) + 1e-9
+    assert (np.abs(counts.mean(axis=0) - individual.mean(axis=0)) < 5 * std_error + 1).all()
+
+
+def test_resumed_run_matches_uninterrupted_run(tmp_path):
+    model = selfishness_model(pop=1000)
+    full = run_until(model, np.random.default_rng(4), 120)
+    checkpoint = os.path.join(tmp_path, 'checkpoint')
+    run_until(model, np.random.default_rng(4), 70, checkpoint=checkpoint, checkpoint_every=25)
+    resumed = run_until(model, np.random.default_rng(99), 120, checkpoint=checkpoint, checkpoint_every=25)
+    assert isinstance(resumed.history, History)
+    np.testing.assert_array_equal(resumed.history.to_frame().values, full.history.to_frame().values)
+    np.testing.assert_array_equal(resumed.pool, full.pool)
+
+
+def test_parallel_runs_do_not_depend_on_the_number_of_processes():
+    model = powers_model(pop=1000)
+    serial = run_ensemble(model, 20, n_replicates=4, seed=3, processes=1)
+    parallel = run_ensemble(model, 20, n_replicates=4, seed=3, processes=2)
+    np.testing.assert_array_equal(serial.frequencies, parallel.frequencies)
+    islands = run_islands(model, 4, 5, generations=2, seed=1, processes=1).demes
+    np.testing.assert_array_equal(islands, run_islands(model, 4, 5, generations=2, seed=1, processes=3).demes)
+    np.testing.assert_array_equal(run(model, 10, np.random.default_rng(0)), run(model, 10, np.random.default_rng(0)))